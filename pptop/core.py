@@ -114,6 +114,12 @@ events_by_key = {
     'Z': 'cursor-toggle'
 }
 
+# repeated pager events are accumulated until plugin handles them
+pager_events = {
+    'left', 'right', 'up', 'down', 'hshift-left', 'hshift-right', 'page-up',
+    'page-down'
+}
+
 plugins_autostart = []
 
 bottom_bar_help = {10: 'Quit'}
@@ -127,7 +133,7 @@ socket_timeout = 15
 
 injection_timeout = 3
 
-socket_buf = 8192
+socket_buf = 262144
 
 
 class ppLoghandler(logging.Handler):
@@ -163,6 +169,16 @@ def apply_filter(plugin):
         plugin.trigger_threadsafe()
 
 
+def send_key_event(plugin, k, event):
+    if event == plugin.key_event and event in pager_events:
+        plugin.key_repeat += 1
+    else:
+        plugin.key_repeat = 1
+    plugin.key_code = k
+    plugin.key_event = event
+    plugin.trigger_threadsafe()
+
+
 def apply_interval(plugin):
     with scr.lock:
         i = plugin.delay
@@ -514,9 +530,7 @@ def select_process():
                     selector.toggle_pause()
             else:
                 with scr.lock:
-                    selector.key_code = k
-                    selector.key_event = event
-                    selector.trigger_threadsafe()
+                    send_key_event(selector, k, event)
         except:
             log_traceback()
             raise
@@ -554,9 +568,15 @@ def command(cmd, params=None):
             log('critical: no data from injector')
             raise CriticalException('Injector error')
         l = struct.unpack('I', data)[0]
-        data = b''
-        while len(data) != l:
-            data += client.recv(socket_buf)
+        data = bytearray(l)
+        view = memoryview(data)
+        pos = 0
+        while pos < l:
+            n = client.recv_into(view[pos:], l - pos)
+            if not n:
+                log('critical: injector closed connection')
+                raise CriticalException('Injector is gone')
+            pos += n
             if time.time() > time_start + socket_timeout:
                 raise CriticalException('Socket timeout')
         if frame_id != _d.client_frame_id:
@@ -570,7 +590,7 @@ def command(cmd, params=None):
         if data[0] != 0:
             log('injector command error, code: {}'.format(data[0]))
             raise RuntimeError('Injector command error')
-        return pickle.loads(data[1:]) if len(data) > 1 else True
+        return pickle.loads(view[1:]) if len(data) > 1 else True
 
 
 def get_process():
@@ -1057,7 +1077,9 @@ def run():
         for i in command('.path'):
             ppath.append(os.path.abspath(i))
         _d.process_path.extend(sorted(ppath, reverse=True))
-        plugin_process_path.extend(_d.process_path)
+        plugin_process_path.extend(
+            os.path.join(p, '')
+            for p in sorted(_d.process_path, key=len, reverse=True))
         log('process path: {}'.format(_d.process_path))
         switch_plugin(_d.default_plugin)
         recalc_info_col_pos()
@@ -1156,9 +1178,7 @@ def run():
                         except:
                             log_traceback()
                     with scr.lock:
-                        _d.current_plugin['p'].key_code = k
-                        _d.current_plugin['p'].key_event = event
-                        _d.current_plugin['p'].trigger_threadsafe()
+                        send_key_event(_d.current_plugin['p'], k, event)
             except:
                 log_traceback()
                 return
@@ -1481,7 +1501,13 @@ def start():
             if a.wait is not None:
                 args += ('-w', str(a.wait))
             if a.protocol is not None:
-                args += ('-p', str(a.protocol))
+                if a.protocol > pickle.HIGHEST_PROTOCOL or a.protocol < 1:
+                    raise ValueError('Protocol {} is not supported'.format(
+                        a.protocol))
+            # the child may run on a newer Python, always ask for protocol
+            # the client supports
+            args += ('-p', str(a.protocol if a.protocol is not None else
+                               pickle.HIGHEST_PROTOCOL))
             if a.args:
                 args += ('-a', a.args)
             if log_config.fname:
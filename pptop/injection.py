@@ -73,7 +73,10 @@ from pptop.logger import config as log_config, log, log_traceback
 
 socket_timeout = 10
 
-socket_buf = 8192
+socket_buf = 262144
+
+_uint = struct.Struct('I')
+_frame_header = struct.Struct('II')
 
 # compat. with Python 2
 
@@ -160,8 +163,7 @@ def loop(cpid, protocol, runner_mode=False):
             return self.real.writelines(lines)
 
     def send_frame(conn, frame_id, data):
-        conn.sendall(
-            struct.pack('I', len(data)) + struct.pack('I', frame_id) + data)
+        conn.sendall(_frame_header.pack(len(data), frame_id) + data)
         # log('{}: frame {}, {} bytes sent'.format(cpid, frame_id, len(data)))
 
     def send_serialized(conn, frame_id, data):
@@ -204,18 +206,28 @@ def loop(cpid, protocol, runner_mode=False):
             try:
                 time_start = time.time()
                 data = connection.recv(4)
-                frame_id = struct.unpack('I', connection.recv(4))[0]
-                if data:
-                    l = struct.unpack('I', data)[0]
-                    frame = b''
-                    while len(frame) != l:
-                        if time.time() > time_start + socket_timeout:
-                            raise TimeoutError
-                        frame += connection.recv(socket_buf)
-                else:
+                if not data:
+                    log('client disconnected')
                     break
+                frame_id = _uint.unpack(connection.recv(4))[0]
+                l = _uint.unpack(data)[0]
+                frame = bytearray(l)
+                view = memoryview(frame)
+                pos = 0
+                while pos < l:
+                    if time.time() > time_start + socket_timeout:
+                        raise socket.timeout
+                    n = connection.recv_into(view[pos:], l - pos)
+                    if not n:
+                        raise EOFError
+                    pos += n
+                frame = bytes(frame)
+            except (socket.error, EOFError):
+                # socket.timeout is a subclass of socket.error
+                log('client is gone')
+                break
             except:
-                log_traceback('invalid data received or client is gone')
+                log_traceback('invalid data received')
                 break
             if frame:
                 try:
@@ -419,7 +431,7 @@ def start(cpid, protocol=None, lg=None, runner_mode=False):
 
 
 def launch(cpid, wait=True, protocol=None):
-    start(cpid, protocol=None, runner_mode=True)
+    start(cpid, protocol=protocol, runner_mode=True)
     if wait is True:
         log('waiting for ready')
         while not g._runner_ready:
@@ -451,8 +463,6 @@ def main():
     ap.add_argument('-a', '--args', metavar='ARGS', help='Child args (quoted)')
     ap.add_argument('--log', metavar='FILE', help='Send debug log to file')
     a = ap.parse_args()
-    if a.protocol and a.protocol > PICKLE_PROTOCOL:
-        raise ValueError('Protocol {} is not supported'.format(a.protocol))
     if a.log:
         init_logging(a.log)
     with open(a.file) as fh:
@@ -462,7 +472,9 @@ def main():
         import shlex
         sys.argv += shlex.split(a.args)
     log('pptop injection runner started')
-    launch(a.cpid, wait=True if a.wait is None else a.wait)
+    launch(a.cpid,
+           wait=True if a.wait is None else a.wait,
+           protocol=a.protocol)
     g._runner_status = 1
     log('starting main code')
     try:
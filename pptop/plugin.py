@@ -10,6 +10,8 @@ import os
 import threading
 import shutil
 import subprocess
+import operator
+import re
 
 from types import SimpleNamespace
 from collections import OrderedDict
@@ -46,6 +48,9 @@ class GenericPlugin(BackgroundIntervalWorker):
         self.short_name = self.name[:6].capitalize()  # short name (bottom bar)
         self.description = ''  # plugin description
         self.window = None  # working window
+        self._rendered_lines = []  # lines currently drawn by render_table
+        self._formatted_table = None  # last table formatted by render_table
+        self._table_header = None  # last table header with sorting arrow
         self.status_line = None  # status line, if requested
         self.shift = 0  # current vertical shifting
         self.hshift = 0  # current horizontal shifting
@@ -53,9 +58,12 @@ class GenericPlugin(BackgroundIntervalWorker):
         self.config = {}  # plugin configuration
         self.data = []  # contains loaded data
         self.data_lock = threading.Lock()  # should be locked when accesing data
+        self._data_version = 0  # increased every time data is loaded
         self.dtd = []  # data to be displayed (after sorting and filtering)
+        self._dtd_key = None  # data version and settings dtd was built with
         self.filter = ''  # current filter
         self.sorting_col = None  # current sorting column
+        self._sort_keys = {}  # sort key getters, by column
         self.sorting_rev = True  # current sorting direction
         self.sorting_enabled = True  # is sorting enabled
         self.cursor_enabled = True  # is cursor enabled
@@ -69,6 +77,7 @@ class GenericPlugin(BackgroundIntervalWorker):
         self.inputs = {}  # key - hot key, value - input value
         self.key_code = None  # last key pressed, for custom key event handling
         self.key_event = None  # last key event
+        self.key_repeat = 1  # how many times last key event was repeated
         self.injected = False  # is plugin injected
 
     def on_load(self):
@@ -182,58 +191,59 @@ class GenericPlugin(BackgroundIntervalWorker):
         max_pos = len(dtd) - 1
         if max_pos < 0: max_pos = 0
         if self.key_event:
-            if self.key_event == 'cursor-toggle':
-                self.toggle_cursor()
-            elif self.key_event == 'left':
-                self.hshift -= 1
-                if self.hshift < 0:
-                    self.hshift = 0
-            elif self.key_event == 'hshift-left':
-                self.hshift -= 20
-                if self.hshift < 0:
-                    self.hshift = 0
-            elif self.key_event == 'right':
-                self.hshift += 1
-            elif self.key_event == 'hshift-right':
-                self.hshift += 20
-            if self.key_event == 'down':
-                if self.is_cursor_enabled():
-                    self.cursor += 1
-                    if self.cursor > max_pos:
-                        self.cursor = max_pos
-                    if self.cursor - self.shift >= height - 1:
+            for i in range(self.key_repeat):
+                if self.key_event == 'cursor-toggle':
+                    self.toggle_cursor()
+                elif self.key_event == 'left':
+                    self.hshift -= 1
+                    if self.hshift < 0:
+                        self.hshift = 0
+                elif self.key_event == 'hshift-left':
+                    self.hshift -= 20
+                    if self.hshift < 0:
+                        self.hshift = 0
+                elif self.key_event == 'right':
+                    self.hshift += 1
+                elif self.key_event == 'hshift-right':
+                    self.hshift += 20
+                if self.key_event == 'down':
+                    if self.is_cursor_enabled():
+                        self.cursor += 1
+                        if self.cursor > max_pos:
+                            self.cursor = max_pos
+                        if self.cursor - self.shift >= height - 1:
+                            self.shift += 1
+                    else:
+                        self.cursor += 1
                         self.shift += 1
-                else:
-                    self.cursor += 1
-                    self.shift += 1
-            elif self.key_event == 'up':
-                if self.is_cursor_enabled():
-                    self.cursor -= 1
-                else:
-                    self.cursor -= 1
+                elif self.key_event == 'up':
+                    if self.is_cursor_enabled():
+                        self.cursor -= 1
+                    else:
+                        self.cursor -= 1
+                        self.shift -= 1
+                elif self.key_event == 'page-down':
+                    self.cursor += height - 1
+                    self.shift += height - 1
+                elif self.key_event == 'page-up':
+                    self.cursor -= height + 1
+                    self.shift -= height + 1
+                elif self.key_event == 'home':
+                    self.hshift = 0
+                    self.cursor = 0
+                    self.shift = 0
+                elif self.key_event == 'end':
+                    self.cursor = max_pos
+                    self.shift = max_pos - height + 2
+                if self.cursor < 0:
                     self.shift -= 1
-            elif self.key_event == 'page-down':
-                self.cursor += height - 1
-                self.shift += height - 1
-            elif self.key_event == 'page-up':
-                self.cursor -= height + 1
-                self.shift -= height + 1
-            elif self.key_event == 'home':
-                self.hshift = 0
-                self.cursor = 0
-                self.shift = 0
-            elif self.key_event == 'end':
-                self.cursor = max_pos
-                self.shift = max_pos - height + 2
-            if self.cursor < 0:
-                self.shift -= 1
-                self.cursor = 0
-            if self.cursor - self.shift < 0:
-                self.cursor = self.shift - 1
-                if self.cursor < 0: self.cursor = 0
-                self.shift -= 1
-            if self.shift < 0:
-                self.shift = 0
+                    self.cursor = 0
+                if self.cursor - self.shift < 0:
+                    self.cursor = self.shift - 1
+                    if self.cursor < 0: self.cursor = 0
+                    self.shift -= 1
+                if self.shift < 0:
+                    self.shift = 0
         if max_pos == 0:
             self.cursor = 0
             self.shift = 0
@@ -269,6 +279,16 @@ class GenericPlugin(BackgroundIntervalWorker):
         scr.stdscr.addstr(scr.top_lines, 0, title[:width - 1], color)
         scr.stdscr.clrtoeol()
 
+    def print_filter(self):
+        '''
+        Print current filter
+        '''
+        scr.stdscr.addstr(scr.top_lines + 1, 0, ' f="')
+        scr.stdscr.addstr(self.filter[:scr.stdscr.getmaxyx()[1] - 6],
+                          palette.YELLOW_BOLD)
+        scr.stdscr.addstr('"')
+        scr.stdscr.clrtoeol()
+
     def print_empty_sep(self):
         '''
         Print empty separator instead of table header
@@ -335,9 +355,14 @@ class GenericPlugin(BackgroundIntervalWorker):
         self.print_title()
 
     def _load_data(self):
+        version = self._data_version
         try:
             return self.load_data()
         finally:
+            with self.data_lock:
+                # custom load_data methods don't increase data version
+                if self._data_version == version:
+                    self._data_version += 1
             self._loader_active = False
 
     def load_remote_data(self):
@@ -368,6 +393,7 @@ class GenericPlugin(BackgroundIntervalWorker):
             else:
                 d = []
             with self.data_lock:
+                self._data_version += 1
                 if self.append_data:
                     self.data += d
                 else:
@@ -382,6 +408,7 @@ class GenericPlugin(BackgroundIntervalWorker):
         except Exception as e:
             log_traceback()
             self.data = []
+            self._data_version += 1
             with scr.lock:
                 self._error = True
                 self.msg = e
@@ -414,9 +441,12 @@ class GenericPlugin(BackgroundIntervalWorker):
             else:
                 if not self.sorting_col:
                     self.sorting_col = list(dtd[0])[0]
-                for d in sorted(dtd,
-                                key=lambda k: k[self.sorting_col],
-                                reverse=self.sorting_rev):
+                try:
+                    key = self._sort_keys[self.sorting_col]
+                except KeyError:
+                    key = operator.itemgetter(self.sorting_col)
+                    self._sort_keys[self.sorting_col] = key
+                for d in sorted(dtd, key=key, reverse=self.sorting_rev):
                     yield d
 
     def format_dtd(self, dtd):
@@ -443,15 +473,10 @@ class GenericPlugin(BackgroundIntervalWorker):
             for d in dtd:
                 yield d
         else:
-            scr.stdscr.addstr(scr.top_lines + 1, 0, ' f="')
-            scr.stdscr.addstr(self.filter[:scr.stdscr.getmaxyx()[1] - 6],
-                              palette.YELLOW_BOLD)
-            scr.stdscr.addstr('"')
-            scr.stdscr.clrtoeol()
-            scr.stdscr.refresh()
+            needle = self.filter.lower()
             for d in dtd:
-                for k, v in d.items():
-                    if str(v).lower().find(self.filter) > -1:
+                for v in d.values():
+                    if needle in str(v).lower():
                         yield d
                         break
 
@@ -460,6 +485,7 @@ class GenericPlugin(BackgroundIntervalWorker):
         Init plugin working window
         '''
         height, width = scr.stdscr.getmaxyx()
+        self._rendered_lines = []
         self.window = curses.newwin(
             height - scr.top_lines - 3 - (1 if self.need_status_line else 0),
             width, scr.top_lines + 2, 0)
@@ -490,6 +516,7 @@ class GenericPlugin(BackgroundIntervalWorker):
         '''
         with scr.lock:
             if self.window:
+                self._rendered_lines = []
                 self.window.move(0, 0)
                 self.window.clrtoeol()
                 self._visible = False
@@ -661,19 +688,32 @@ class GenericPlugin(BackgroundIntervalWorker):
     def _display_ui(self):
         with self.start_stop_lock:
             if self.is_active():
+                # key events may change sorting, let _display handle them
+                if self._visible and not self.key_event:
+                    self._prepare_dtd()
                 with scr.lock:
                     if self._visible:
                         return self._display()
 
+    def _prepare_dtd(self, force=False):
+        with self.data_lock:
+            # filter may be changed while dtd is being built, so store the
+            # key it was actually built with
+            key = self._get_dtd_key()
+            if force or self._dtd_key != key:
+                self.dtd = list(
+                    self.filter_dtd(dtd=self.format_dtd(dtd=self.sort_dtd(
+                        dtd=self.data))))
+                self._dtd_key = key
+            return self.dtd
+
     def _display(self):
         self.print_title()
-        scr.stdscr.refresh()
+        if self.filter:
+            self.print_filter()
+        scr.stdscr.noutrefresh()
         self.handle_sorting_event()
-        with self.data_lock:
-            dtd = list(
-                self.filter_dtd(dtd=self.format_dtd(dtd=self.sort_dtd(
-                    dtd=self.data))))
-        self.dtd = dtd
+        dtd = self._prepare_dtd(force=self.key_event == 'KEY_RESIZE')
         if self.key_event:
             if not self.filter: self.print_message()
             if self.handle_key_event(
@@ -682,17 +722,24 @@ class GenericPlugin(BackgroundIntervalWorker):
         self.handle_pager_event(dtd=dtd)
         self.key_event = None
         self.key_code = None
+        self.key_repeat = 1
         if dtd:
             self.render(dtd=dtd)
         else:
+            self._rendered_lines = []
             self.window.move(0, 0)
             self.render_empty()
-        self.window.refresh()
+        self.window.noutrefresh()
         if self.need_status_line:
-            self.status_line.refresh()
-        scr.stdscr.refresh()
+            self.status_line.noutrefresh()
+        scr.stdscr.noutrefresh()
+        curses.doupdate()
         return True
 
+    def _get_dtd_key(self):
+        return (self._data_version, self.filter, self.sorting_enabled,
+                self.sorting_col, self.sorting_rev)
+
     def is_cursor_enabled(self):
         return self.cursor_enabled and self._cursor_enabled_by_user
 
@@ -763,26 +810,33 @@ class GenericPlugin(BackgroundIntervalWorker):
                 element=element,
                 raw=raw)[hshift:].ljust(max_width - 1)[:max_width - 1]
 
-        self.window.move(0, 0)
-        self.window.clrtobot()
         height, width = self.window.getmaxyx()
         table_custom_col_colors = hasattr(self, 'get_table_col_color')
+        prev_lines = self._rendered_lines
+        lines = []
         if table:
-            h, tbl = rapidtables.format_table(table, fmt=2)
-            header = (' ' if print_selector else '') + '  '.join(h)
-            if sorting_col:
-                if sorting_rev:
-                    s = glyph.ARROW_UP
-                else:
-                    s = glyph.ARROW_DOWN
-                if header.startswith(sorting_col + ' '):
-                    header = header.replace(sorting_col + ' ', s + sorting_col,
-                                            1)
-                else:
-                    header = header.replace(' ' + sorting_col, s + sorting_col)
-            self.window.addstr(
-                0, 0, format_row(raw=header, max_width=width, hshift=hshift),
-                palette.HEADER)
+            h, tbl = self._format_table(table)
+            header_sig = (h, print_selector, sorting_col, sorting_rev)
+            if self._table_header and self._table_header[0] == header_sig:
+                header = self._table_header[1]
+            else:
+                header = (' ' if print_selector else '') + '  '.join(h)
+                if sorting_col:
+                    if sorting_rev:
+                        s = glyph.ARROW_UP
+                    else:
+                        s = glyph.ARROW_DOWN
+                    if header.startswith(sorting_col + ' '):
+                        header = header.replace(sorting_col + ' ',
+                                                s + sorting_col, 1)
+                    else:
+                        header = header.replace(' ' + sorting_col,
+                                                s + sorting_col)
+                self._table_header = (header_sig, header)
+            header = format_row(raw=header, max_width=width, hshift=hshift)
+            lines.append(header)
+            if not prev_lines or prev_lines[0] != header:
+                self.window.addstr(0, 0, header, palette.HEADER)
             if table_custom_col_colors:
                 cols = [len(x) for x in h]
                 spaces = 2
@@ -791,14 +845,17 @@ class GenericPlugin(BackgroundIntervalWorker):
                 for i in range(len(cols) - 1):
                     col_starts.append(cols[i] + pos + spaces)
                     pos += cols[i] + spaces
+            join_cols = '  '.join
             for i, (t, r) in enumerate(zip(tbl, table)):
-                spacer = '  '
                 if print_selector:
-                    t = (glyph.SELECTOR
-                         if cursor == i else ' ') + spacer.join(t)
+                    t = (glyph.SELECTOR if cursor == i else ' ') + join_cols(t)
                 else:
-                    t = spacer.join(t)
+                    t = join_cols(t)
                 if table_custom_col_colors and cursor != i:
+                    line = (t, hshift, width)
+                    lines.append(line)
+                    if len(prev_lines) > i + 1 and prev_lines[i + 1] == line:
+                        continue
                     self.window.move(i + 1, 0)
                     rraw = t[hshift:hshift + width - 1]
                     limit = width - 1
@@ -821,17 +878,38 @@ class GenericPlugin(BackgroundIntervalWorker):
                                 limit -= len(raw)
                             else:
                                 break
+                    self.window.clrtoeol()
                 else:
-                    self.window.addstr(
-                        1 + i, 0,
-                        format_row(element=r,
-                                   raw=t,
-                                   max_width=width,
-                                   hshift=hshift),
-                        palette.CURSOR if cursor == i else
-                        (self.get_table_row_color(r, t) or palette.DEFAULT))
+                    line = (format_row(element=r,
+                                       raw=t,
+                                       max_width=width,
+                                       hshift=hshift),
+                            palette.CURSOR if cursor == i else
+                            (self.get_table_row_color(r, t) or palette.DEFAULT))
+                    lines.append(line)
+                    if len(prev_lines) > i + 1 and prev_lines[i + 1] == line:
+                        continue
+                    self.window.addstr(1 + i, 0, *line)
+            if len(prev_lines) > len(lines):
+                self.window.move(len(lines), 0)
+                self.window.clrtobot()
         else:
+            self.window.move(0, 0)
+            self.window.clrtobot()
             self.print_empty_sep()
+        self._rendered_lines = lines
+
+    def _format_table(self, table):
+        # column widths and cells are the same while table rows are (e.g.
+        # only cursor is moved), reuse them
+        cached = self._formatted_table
+        if cached and len(cached[0]) == len(table) and all(
+                a is b for a, b in zip(cached[0], table)):
+            return cached[1], cached[2]
+        h, tbl = rapidtables.format_table(table, fmt=2)
+        tbl = list(tbl)
+        self._formatted_table = (table, h, tbl)
+        return h, tbl
 
     def render_table_col(self, raw, color, element, key, value):
         '''
@@ -863,14 +941,14 @@ class GenericPlugin(BackgroundIntervalWorker):
         return raw
 
 
+_my_mod_re = re.compile(r'^pptop\.|^pptopcontrib\.|_pptop_injection')
+
+_my_mods = frozenset(('tracemalloc', 'linecache', 'yappi'))
+
+
 @lru_cache(maxsize=8192)
 def not_my_mod(mod):
-    return not mod.startswith('pptop.') and \
-            not mod.startswith('pptopcontrib.') and \
-                mod.find('_pptop_injection') == -1 and \
-                not mod == 'tracemalloc' and \
-                not mod == 'linecache' and \
-                not mod == 'yappi'
+    return mod not in _my_mods and not _my_mod_re.search(mod)
 
 
 @lru_cache(maxsize=8192)
@@ -880,7 +958,9 @@ def format_mod_name(f):
 
     Args:
         f: file
-        process_path: list of path dictionaries
+
+    process_path contains sys.path of the connected process, longest paths
+    first, each one ending with path separator
     '''
     from pptop.core import get_child_info
     f = abspath(f)
@@ -889,7 +969,7 @@ def format_mod_name(f):
         return '__main__'
     for p in process_path:
         if f.startswith(p):
-            f = f[len(p) + 1:]
+            f = f[len(p):]
             break
     if f.endswith('.py'):
         f = f[:-3]
@@ -905,6 +985,11 @@ def abspath(f):
     return os.path.abspath(f)
 
 
+@lru_cache(maxsize=8192)
+def format_file_line(f, lineno):
+    return '{}:{}'.format(abspath(f), lineno)
+
+
 def bytes_to_iso(i):
     numbers = [(1000, 'k'), (1000000, 'M'), (1000000000, 'G'),
                (1000000000000, 'T')]
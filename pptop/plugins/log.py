@@ -1,8 +1,11 @@
-from pptop.plugin import GenericPlugin, abspath, palette
+from pptop.plugin import GenericPlugin, format_file_line, palette
 
 import os
+import logging
 
 from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
 
 
 class Plugin(GenericPlugin):
@@ -22,23 +25,20 @@ class Plugin(GenericPlugin):
         result = []
         for record in data:
             r = OrderedDict()
-            r['logger'] = record.name
-            r['time'] = record.created
-            r['level'] = record.levelno
-            r['module'] = record.module
-            r['thread'] = record.threadName
-            r['file'] = '{}:{}'.format(abspath(record.pathname), record.lineno)
-            r['message'] = record.getMessage().replace('\n', ' ')
+            r['logger'] = record[0]
+            r['time'] = record[1]
+            r['level'] = record[2]
+            r['module'] = record[3]
+            r['thread'] = record[4]
+            r['file'] = format_file_line(record[5], record[6])
+            r['message'] = record[7].replace('\n', ' ')
             result.append(r)
         return result
 
     def format_dtd(self, dtd):
-        import logging
-        from datetime import datetime
         for t in dtd:
             z = t.copy()
-            z['time'] = datetime.fromtimestamp(
-                    z['time']).strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]
+            z['time'] = format_time(z['time'])
             z['level'] = logging.getLevelName(z['level'])
             yield z
 
@@ -58,6 +58,11 @@ class Plugin(GenericPlugin):
         super().run(*args, **kwargs)
 
 
+@lru_cache(maxsize=2048)
+def format_time(t):
+    return datetime.fromtimestamp(t).strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]
+
+
 def injection_load(**kwargs):
     import logging
     import threading
@@ -90,4 +95,5 @@ def injection_unload(**kwargs):
 
 
 def injection(**kwargs):
-    return g.log_handler.get_collected()
+    return [(r.name, r.created, r.levelno, r.module, r.threadName, r.pathname,
+             r.lineno, r.getMessage()) for r in g.log_handler.get_collected()]
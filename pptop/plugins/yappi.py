@@ -1,7 +1,5 @@
 from pptop.plugin import GenericPlugin, format_mod_name, not_my_mod
-from pptop.plugin import abspath, palette
-
-from collections import OrderedDict
+from pptop.plugin import format_file_line, palette
 
 
 class Plugin(GenericPlugin):
@@ -28,27 +26,25 @@ class Plugin(GenericPlugin):
         for s in data:
             mod = format_mod_name(s[6])
             if not_my_mod(mod):
-                d = OrderedDict()
-                d['function'] = '{}.{}'.format(mod, s[0])
-                d['ncall'] = s[1]
-                d['nacall'] = s[2]
-                d['ttot'] = s[3]
-                d['tsub'] = s[4]
-                d['tavg'] = s[5]
-                d['file'] = '{}:{}'.format(abspath(s[6]), s[7])
-                d['builtin'] = 'builtin' if s[8] else ''
-                sess.append(d)
+                sess.append({
+                    'function': '{}.{}'.format(mod, s[0]),
+                    'ncall': s[1],
+                    'nacall': s[2],
+                    'ttot': s[3],
+                    'tsub': s[4],
+                    'tavg': s[5],
+                    'file': format_file_line(s[6], s[7]),
+                    'builtin': 'builtin' if s[8] else ''
+                })
         return sess
 
     def format_dtd(self, dtd):
-        ks = ['ttot', 'tsub', 'tavg']
+        fmt = '{:.3f}'.format
         for s in dtd:
             z = s.copy()
-            for k in ks:
-                try:
-                    z[k] = '{:.3f}'.format(float(z[k]))
-                except:
-                    pass
+            z['ttot'] = fmt(s['ttot'])
+            z['tsub'] = fmt(s['tsub'])
+            z['tavg'] = fmt(s['tavg'])
             yield z
 
     def get_table_col_color(self, element, key, value):